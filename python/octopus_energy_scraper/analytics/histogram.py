@@ -0,0 +1,92 @@
+"""Mergeable fixed-width histogram used to answer consumption percentile queries."""
+
+import math
+import typing as t
+from collections import Counter
+from decimal import Decimal
+
+# Octopus reports consumption to 3 decimal places, so readings at that precision land exactly on a
+# bin and their quantiles are exact. Finer values are rounded to the nearest bin.
+DEFAULT_BIN_WIDTH = 0.001
+
+
+class UsageHistogram:
+    """Sparse fixed-width histogram of consumption values.
+
+    Bins are keyed by ``round(value / bin_width)`` so histograms with the same bin width can be
+    merged by summing counts, and quantile queries only walk the occupied bins rather than every
+    value that was added. Values that are multiples of ``bin_width`` are recorded exactly, others
+    are rounded to the nearest bin so quantiles are accurate to within half a bin width. Values too
+    large to bin are counted in ``overflow``.
+    """
+
+    def __init__(self, bin_width: float = DEFAULT_BIN_WIDTH) -> None:
+        if bin_width <= 0:
+            raise ValueError(f"bin_width must be positive, got {bin_width}")
+
+        self.bin_width = bin_width
+        # Decimal places needed to print a bin edge, so quantiles don't carry float noise.
+        self._decimals = max(0, -int(Decimal(str(bin_width)).as_tuple().exponent))
+        self.counts: t.Counter[int] = Counter()
+        self.overflow = 0
+
+    @property
+    def total(self) -> int:
+        """Number of values recorded in the histogram."""
+        return sum(self.counts.values()) + self.overflow
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Record ``count`` occurrences of ``value``."""
+        key = self._key(value)
+        if key is None:
+            self.overflow += count
+        else:
+            self.counts[key] += count
+
+    def remove(self, value: float, count: int = 1) -> None:
+        """Forget ``count`` occurrences of a previously added ``value``."""
+        key = self._key(value)
+        recorded = self.overflow if key is None else self.counts.get(key, 0)
+        if recorded < count:
+            raise ValueError(f"cannot remove {count} of {value}, only {recorded} recorded")
+
+        if key is None:
+            self.overflow -= count
+        elif recorded == count:
+            del self.counts[key]
+        else:
+            self.counts[key] -= count
+
+    def merge(self, other: "UsageHistogram") -> None:
+        """Fold the counts from ``other`` into this histogram."""
+        if other.bin_width != self.bin_width:
+            raise ValueError(
+                f"cannot merge histograms with bin widths {self.bin_width} and {other.bin_width}",
+            )
+        self.counts.update(other.counts)
+        self.overflow += other.overflow
+
+    def quantile(self, quantile: float) -> t.Optional[float]:
+        """Nearest-rank estimate of the given quantile, None if the histogram is empty."""
+        if not 0 <= quantile <= 1:
+            raise ValueError(f"quantile must be within [0, 1], got {quantile}")
+
+        total = self.total
+        if not total:
+            return None
+
+        rank = max(1, math.ceil(quantile * total))
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= rank:
+                return round(key * self.bin_width, self._decimals)
+
+        return math.inf
+
+    def _key(self, value: float) -> t.Optional[int]:
+        """Bin index for ``value``, None if it overflows."""
+        scaled = value / self.bin_width
+        if math.isinf(scaled):
+            return None
+        return round(scaled)
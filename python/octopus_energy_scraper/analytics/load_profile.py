@@ -0,0 +1,275 @@
+"""Half-hourly load profile and time-of-use analytics over stored consumption readings."""
+
+import logging
+import typing as t
+from datetime import date, datetime, tzinfo
+from zoneinfo import ZoneInfo
+
+from pydantic import BaseModel  # pylint: disable = no-name-in-module
+
+from ..types.usage import RawUsage
+from .histogram import DEFAULT_BIN_WIDTH, UsageHistogram
+
+LOG = logging.getLogger(__name__)
+
+SLOTS_PER_DAY = 48
+DAYS_PER_WEEK = 7
+
+DEFAULT_TIMEZONE = ZoneInfo("Europe/London")
+DEFAULT_BASELOAD_QUANTILE = 0.05
+
+MonthKey = t.Tuple[int, int]
+
+
+class LoadProfile(BaseModel):
+    """Mean consumption per half-hour slot, for each weekday (Monday is 0).
+
+    Slots with no readings in the queried window are None.
+    """
+
+    mean_consumption: t.Sequence[t.Sequence[t.Optional[float]]]
+    readings: int
+
+    class Config:
+        frozen = True
+
+
+class _Bucket:
+    """Aggregated readings for a span of days, mergeable with other buckets."""
+
+    def __init__(self, bin_width: float) -> None:
+        self.bin_width = bin_width
+        self.totals = [[0.0] * SLOTS_PER_DAY for _ in range(DAYS_PER_WEEK)]
+        self.counts = [[0] * SLOTS_PER_DAY for _ in range(DAYS_PER_WEEK)]
+        self.histogram = UsageHistogram(bin_width)
+        self.slot_histograms: t.MutableMapping[int, UsageHistogram] = {}
+
+    def add(self, weekday: int, slot: int, consumption: float) -> None:
+        self.totals[weekday][slot] += consumption
+        self.counts[weekday][slot] += 1
+        self.histogram.add(consumption)
+        if slot not in self.slot_histograms:
+            self.slot_histograms[slot] = UsageHistogram(self.bin_width)
+        self.slot_histograms[slot].add(consumption)
+
+    def remove(self, weekday: int, slot: int, consumption: float) -> None:
+        self.counts[weekday][slot] -= 1
+        if self.counts[weekday][slot]:
+            self.totals[weekday][slot] -= consumption
+        else:
+            # Avoid carrying float residue into a slot that no longer has readings.
+            self.totals[weekday][slot] = 0.0
+        self.histogram.remove(consumption)
+        self.slot_histograms[slot].remove(consumption)
+
+
+class _Window(t.NamedTuple):
+    """Precomputed buckets fully inside a query window, plus readings from its edge days."""
+
+    buckets: t.Sequence[_Bucket]
+    # (weekday, slot, consumption) for readings on days not covered by ``buckets``.
+    edge_readings: t.Sequence[t.Tuple[int, int, float]]
+
+
+class UsageAnalytics:
+    """Incrementally maintained time-of-use statistics for one energy type.
+
+    Readings are aggregated by local year and month, and across all time, as they are added and
+    kept per local day. Unbounded queries read the all-time bucket directly, bounded ones merge
+    whole-year and whole-month buckets and only visit individual readings at the window edges.
+    Each query merges only the state it reads, so percentile cost scales with the occupied
+    histogram bins of the years and months involved. Windows are half-open ``[start, end)``
+    ranges of local dates, None leaves that side unbounded.
+    """
+
+    def __init__(
+        self,
+        timezone: tzinfo = DEFAULT_TIMEZONE,
+        bin_width: float = DEFAULT_BIN_WIDTH,
+    ) -> None:
+        self.timezone = timezone
+        self.bin_width = bin_width
+
+        self._all_time = _Bucket(bin_width)
+        self._years: t.MutableMapping[int, _Bucket] = {}
+        self._months: t.MutableMapping[MonthKey, _Bucket] = {}
+        # Consumption per interval, grouped by month and local day.
+        self._days: t.MutableMapping[
+            MonthKey,
+            t.MutableMapping[date, t.MutableMapping[datetime, float]],
+        ] = {}
+        self._readings = 0
+
+    def __len__(self) -> int:
+        return self._readings
+
+    def add_readings(self, readings: t.Iterable[RawUsage]) -> int:
+        """Fold readings into the precomputed state.
+
+        A reading for an interval that has already been recorded replaces the earlier one, matching
+        how the cache treats revised readings. Returns the number of readings added or replaced.
+        """
+        changed = 0
+        for reading in readings:
+            day, weekday, slot = self._locate(reading.interval_start)
+            month = (day.year, day.month)
+
+            if day.year not in self._years:
+                self._years[day.year] = _Bucket(self.bin_width)
+            if month not in self._months:
+                self._months[month] = _Bucket(self.bin_width)
+                self._days[month] = {}
+            day_readings = self._days[month].setdefault(day, {})
+
+            previous = day_readings.get(reading.interval_start)
+            if previous == reading.consumption:
+                continue
+            if previous is None:
+                self._readings += 1
+            else:
+                self._months[month].remove(weekday, slot, previous)
+                self._years[day.year].remove(weekday, slot, previous)
+                self._all_time.remove(weekday, slot, previous)
+
+            day_readings[reading.interval_start] = reading.consumption
+            self._months[month].add(weekday, slot, reading.consumption)
+            self._years[day.year].add(weekday, slot, reading.consumption)
+            self._all_time.add(weekday, slot, reading.consumption)
+            changed += 1
+
+        LOG.debug(f"Added or replaced {changed} readings in usage analytics.")
+        return changed
+
+    def load_profile(
+        self,
+        start: t.Optional[date] = None,
+        end: t.Optional[date] = None,
+    ) -> LoadProfile:
+        """Mean consumption for each weekday and half-hour slot within the window."""
+        window = self._window(start, end)
+        totals = [[0.0] * SLOTS_PER_DAY for _ in range(DAYS_PER_WEEK)]
+        counts = [[0] * SLOTS_PER_DAY for _ in range(DAYS_PER_WEEK)]
+        for bucket in window.buckets:
+            for weekday in range(DAYS_PER_WEEK):
+                for slot in range(SLOTS_PER_DAY):
+                    totals[weekday][slot] += bucket.totals[weekday][slot]
+                    counts[weekday][slot] += bucket.counts[weekday][slot]
+        for weekday, slot, consumption in window.edge_readings:
+            totals[weekday][slot] += consumption
+            counts[weekday][slot] += 1
+
+        mean_consumption = [
+            [
+                total / count if count else None
+                for total, count in zip(totals[weekday], counts[weekday])
+            ]
+            for weekday in range(DAYS_PER_WEEK)
+        ]
+        return LoadProfile(
+            mean_consumption=mean_consumption,
+            readings=sum(sum(weekday_counts) for weekday_counts in counts),
+        )
+
+    def percentiles(
+        self,
+        quantiles: t.Sequence[float] = (0.5, 0.95),
+        start: t.Optional[date] = None,
+        end: t.Optional[date] = None,
+        slot: t.Optional[int] = None,
+    ) -> t.Mapping[float, t.Optional[float]]:
+        """Half-hourly consumption percentiles within the window.
+
+        If ``slot`` is provided, only readings for that half-hour of the day are considered.
+        Values are None when the window holds no readings.
+        """
+        if slot is not None and not 0 <= slot < SLOTS_PER_DAY:
+            raise ValueError(f"slot must be within [0, {SLOTS_PER_DAY}), got {slot}")
+
+        def select(bucket: _Bucket) -> t.Optional[UsageHistogram]:
+            if slot is None:
+                return bucket.histogram
+            return bucket.slot_histograms.get(slot)
+
+        window = self._window(start, end)
+        if len(window.buckets) == 1 and not window.edge_readings:
+            # Read the precomputed histogram as-is, there is nothing to merge it with.
+            histogram = select(window.buckets[0]) or UsageHistogram(self.bin_width)
+        else:
+            histogram = UsageHistogram(self.bin_width)
+            for bucket in window.buckets:
+                selected = select(bucket)
+                if selected is not None:
+                    histogram.merge(selected)
+            for _, reading_slot, consumption in window.edge_readings:
+                if slot is None or reading_slot == slot:
+                    histogram.add(consumption)
+
+        return {quantile: histogram.quantile(quantile) for quantile in quantiles}
+
+    def baseload(
+        self,
+        start: t.Optional[date] = None,
+        end: t.Optional[date] = None,
+        quantile: float = DEFAULT_BASELOAD_QUANTILE,
+    ) -> t.Optional[float]:
+        """Estimate always-on consumption per half-hour as a low percentile of readings."""
+        return self.percentiles((quantile,), start, end)[quantile]
+
+    def _window(self, start: t.Optional[date], end: t.Optional[date]) -> _Window:
+        """Collect the precomputed state covering ``[start, end)``."""
+        if start is None and end is None:
+            return _Window(buckets=[self._all_time], edge_readings=[])
+
+        buckets: t.MutableSequence[_Bucket] = []
+        edge_readings: t.MutableSequence[t.Tuple[int, int, float]] = []
+        for year, year_bucket in self._years.items():
+            overlaps, covered = self._overlap(date(year, 1, 1), date(year + 1, 1, 1), start, end)
+            if covered:
+                buckets.append(year_bucket)
+            if covered or not overlaps:
+                continue
+
+            for month in range(1, 13):
+                if (year, month) not in self._months:
+                    continue
+                month_end = date(year + month // 12, month % 12 + 1, 1)
+                overlaps, covered = self._overlap(date(year, month, 1), month_end, start, end)
+                if covered:
+                    buckets.append(self._months[(year, month)])
+                if covered or not overlaps:
+                    continue
+
+                edge_readings.extend(self._edge_readings((year, month), start, end))
+
+        return _Window(buckets=buckets, edge_readings=edge_readings)
+
+    @staticmethod
+    def _overlap(
+        span_start: date,
+        span_end: date,
+        start: t.Optional[date],
+        end: t.Optional[date],
+    ) -> t.Tuple[bool, bool]:
+        """Whether ``[span_start, span_end)`` overlaps, and is covered by, ``[start, end)``."""
+        if (end is not None and span_start >= end) or (start is not None and span_end <= start):
+            return False, False
+        return True, (start is None or start <= span_start) and (end is None or span_end <= end)
+
+    def _edge_readings(
+        self,
+        month: MonthKey,
+        start: t.Optional[date],
+        end: t.Optional[date],
+    ) -> t.Iterator[t.Tuple[int, int, float]]:
+        """Readings within ``[start, end)`` from a month the window only partially covers."""
+        for day, day_readings in self._days[month].items():
+            if (start is None or start <= day) and (end is None or day < end):
+                for interval_start, consumption in day_readings.items():
+                    _, weekday, slot = self._locate(interval_start)
+                    yield weekday, slot, consumption
+
+    def _locate(self, interval_start: datetime) -> t.Tuple[date, int, int]:
+        """Local day, weekday and half-hour slot an interval starts in."""
+        local_start = interval_start.astimezone(self.timezone)
+        day = local_start.date()
+        return day, day.weekday(), local_start.hour * 2 + local_start.minute // 30
@@ -5,6 +5,7 @@ from types import TracebackType
 
 from abc import ABC, abstractmethod
 
+from ..analytics.load_profile import UsageAnalytics
 from ..types.usage import EnergyType, RawUsage
 
 
@@ -31,9 +32,14 @@ class CacheBase(ABC):
     def add_reading(self, reading: t.Iterable[RawUsage], energy_type: EnergyType) -> int:
         """Add new consumption readings to data store.
 
-        Should return number of records added, false if it was already present.
+        A reading for an interval that is already stored replaces the stored reading. Should
+        return number of records added or revised, false if it was already present.
         """
 
+    @abstractmethod
+    def usage_analytics(self, energy_type: EnergyType) -> UsageAnalytics:
+        """Retrieve time-of-use analytics, kept up to date as readings are added."""
+
     @abstractmethod
     def __enter__(self) -> "CacheBase":
         """Provide context manager to provide transactions on IO etc."""
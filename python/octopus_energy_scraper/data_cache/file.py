@@ -2,11 +2,13 @@
 
 import logging
 import typing as t
+from datetime import datetime
 from pathlib import Path
 from types import TracebackType
 
 from pydantic import BaseModel, Field, PrivateAttr  # pylint: disable = no-name-in-module
 
+from ..analytics.load_profile import UsageAnalytics
 from ..types.usage import EnergyType, RawUsage
 from .base import CacheBase
 
@@ -18,8 +20,12 @@ class UsageData(BaseModel):  # pylint: disable = too-few-public-methods
 
     electricity_usage: t.MutableSequence[RawUsage] = []
     gas_usage: t.MutableSequence[RawUsage] = []
-    _uniq_electricity: t.Set[RawUsage] = PrivateAttr(set())
-    _uniq_gas: t.Set[RawUsage] = PrivateAttr(set())
+    # Keyed by interval start, a revised reading for an interval replaces the earlier one.
+    _uniq_electricity: t.Dict[datetime, RawUsage] = PrivateAttr({})
+    _uniq_gas: t.Dict[datetime, RawUsage] = PrivateAttr({})
+    # Built on first use, then kept up to date as readings are added.
+    _electricity_analytics: t.Optional[UsageAnalytics] = PrivateAttr(None)
+    _gas_analytics: t.Optional[UsageAnalytics] = PrivateAttr(None)
 
 
 class FileCache(CacheBase, BaseModel):
@@ -36,8 +42,12 @@ class FileCache(CacheBase, BaseModel):
 
         disk_data = self.parse_file(self.cache_path)
         self.usage_data = disk_data.usage_data
-        self.usage_data._uniq_electricity = set(self.usage_data.electricity_usage)
-        self.usage_data._uniq_gas = set(self.usage_data.gas_usage)
+        self.usage_data._uniq_electricity = {
+            reading.interval_start: reading for reading in self.usage_data.electricity_usage
+        }
+        self.usage_data._uniq_gas = {
+            reading.interval_start: reading for reading in self.usage_data.gas_usage
+        }
 
     def flush(self) -> None:
         """Flush cache to disk."""
@@ -45,9 +55,15 @@ class FileCache(CacheBase, BaseModel):
         self.cache_path.parent.mkdir(parents=True, exist_ok=True)
         self.cache_path.touch()
 
-        # transfer in-memory sets to lists to be flushed to disk... this is messy hacky...
-        self.usage_data.electricity_usage = sorted(self.usage_data._uniq_electricity, key=lambda i: i.interval_start)
-        self.usage_data.gas_usage = sorted(self.usage_data._uniq_gas, key=lambda i: i.interval_start)
+        # transfer in-memory maps to lists to be flushed to disk... this is messy hacky...
+        self.usage_data.electricity_usage = sorted(
+            self.usage_data._uniq_electricity.values(),
+            key=lambda i: i.interval_start,
+        )
+        self.usage_data.gas_usage = sorted(
+            self.usage_data._uniq_gas.values(),
+            key=lambda i: i.interval_start,
+        )
 
         bytes_written = self.cache_path.write_text(self.json(exclude={"cache_path"}))
         LOG.info(
@@ -59,32 +75,68 @@ class FileCache(CacheBase, BaseModel):
     def earliest_reading(self, energy_type: EnergyType) -> RawUsage:
         match energy_type:
             case EnergyType.ELECTRICITY:
-                return min(self.usage_data._uniq_electricity, key=lambda i: i.interval_start)
+                return min(
+                    self.usage_data._uniq_electricity.values(),
+                    key=lambda i: i.interval_start,
+                )
             case EnergyType.GAS:
-                return min(self.usage_data._uniq_gas, key=lambda i: i.interval_start)
+                return min(self.usage_data._uniq_gas.values(), key=lambda i: i.interval_start)
 
     def latest_reading(self, energy_type: EnergyType) -> RawUsage:
         match energy_type:
             case EnergyType.ELECTRICITY:
-                return max(self.usage_data._uniq_electricity, key=lambda i: i.interval_end)
+                return max(
+                    self.usage_data._uniq_electricity.values(),
+                    key=lambda i: i.interval_end,
+                )
             case EnergyType.GAS:
-                return max(self.usage_data._uniq_gas, key=lambda i: i.interval_end)
+                return max(self.usage_data._uniq_gas.values(), key=lambda i: i.interval_end)
 
     def add_reading(self, readings: t.Iterable[RawUsage], energy_type: EnergyType) -> int:
         match energy_type:
             case EnergyType.ELECTRICITY:
-                before = len(self.usage_data._uniq_electricity)
-                self.usage_data._uniq_electricity.update(readings)
-                after = len(self.usage_data._uniq_electricity)
-                LOG.debug(f"Added {after-before} electricity records to cache.")
-                return after - before
+                changed = self._merge_readings(self.usage_data._uniq_electricity, readings)
+                if self.usage_data._electricity_analytics is not None:
+                    self.usage_data._electricity_analytics.add_readings(changed)
+                LOG.debug(f"Added or revised {len(changed)} electricity records in cache.")
+                return len(changed)
+
+            case EnergyType.GAS:
+                changed = self._merge_readings(self.usage_data._uniq_gas, readings)
+                if self.usage_data._gas_analytics is not None:
+                    self.usage_data._gas_analytics.add_readings(changed)
+                LOG.debug(f"Added or revised {len(changed)} gas records in cache.")
+                return len(changed)
 
+    def usage_analytics(self, energy_type: EnergyType) -> UsageAnalytics:
+        match energy_type:
+            case EnergyType.ELECTRICITY:
+                if self.usage_data._electricity_analytics is None:
+                    self.usage_data._electricity_analytics = UsageAnalytics()
+                    self.usage_data._electricity_analytics.add_readings(
+                        self.usage_data._uniq_electricity.values(),
+                    )
+                return self.usage_data._electricity_analytics
             case EnergyType.GAS:
-                before = len(self.usage_data._uniq_gas)
-                self.usage_data._uniq_gas.update(readings)
-                after = len(self.usage_data._uniq_gas)
-                LOG.debug(f"Added {after-before} gas records to cache.")
-                return after - before
+                if self.usage_data._gas_analytics is None:
+                    self.usage_data._gas_analytics = UsageAnalytics()
+                    self.usage_data._gas_analytics.add_readings(
+                        self.usage_data._uniq_gas.values(),
+                    )
+                return self.usage_data._gas_analytics
+
+    @staticmethod
+    def _merge_readings(
+        stored: t.MutableMapping[datetime, RawUsage],
+        readings: t.Iterable[RawUsage],
+    ) -> t.Sequence[RawUsage]:
+        """Store readings by interval, returning those that are new or revise a stored one."""
+        changed: t.MutableMapping[datetime, RawUsage] = {}
+        for reading in readings:
+            if stored.get(reading.interval_start) != reading:
+                stored[reading.interval_start] = reading
+                changed[reading.interval_start] = reading
+        return list(changed.values())
 
     def __enter__(self) -> "FileCache":
         """Provide context manager to flush on exit."""
@@ -0,0 +1,226 @@
+"""Verify load profile and percentile analytics."""
+
+import math
+import typing as t
+from datetime import date, datetime, timedelta, timezone
+
+import hypothesis as h
+import pytest
+from hypothesis import strategies as st
+
+from octopus_energy_scraper.analytics.histogram import UsageHistogram
+from octopus_energy_scraper.analytics.load_profile import UsageAnalytics
+from octopus_energy_scraper.types.usage import RawUsage
+
+UTC = timezone.utc
+
+
+def mk_reading(consumption: float, start: datetime) -> RawUsage:
+    return RawUsage(
+        consumption=consumption,
+        interval_start=start,
+        interval_end=start + timedelta(minutes=30),
+    )
+
+
+def nearest_rank(values: t.Sequence[float], quantile: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(quantile * len(ordered))) - 1]
+
+
+ConsumptionStrat = st.integers(min_value=0, max_value=5000).map(lambda i: i / 1000)
+
+
+@h.given(
+    values=st.lists(ConsumptionStrat, min_size=1, max_size=200),
+    quantile=st.floats(min_value=0, max_value=1),
+)
+def test_histogram_quantile_matches_nearest_rank(
+    values: t.Sequence[float],
+    quantile: float,
+) -> None:
+    histogram = UsageHistogram()
+    for value in values:
+        histogram.add(value)
+
+    # 3 decimal place readings sit exactly on a bin, so quantiles come back without float noise.
+    assert histogram.quantile(quantile) == nearest_rank(values, quantile)
+
+
+@h.given(
+    left=st.lists(ConsumptionStrat, max_size=50),
+    right=st.lists(ConsumptionStrat, max_size=50),
+)
+def test_histogram_merge(left: t.Sequence[float], right: t.Sequence[float]) -> None:
+    merged, combined = UsageHistogram(), UsageHistogram()
+    other = UsageHistogram()
+    for value in left:
+        merged.add(value)
+        combined.add(value)
+    for value in right:
+        other.add(value)
+        combined.add(value)
+
+    merged.merge(other)
+    assert merged.counts == combined.counts
+    assert merged.total == len(left) + len(right)
+
+
+def test_histogram_overflow() -> None:
+    histogram = UsageHistogram()
+    histogram.add(0.5)
+    histogram.add(math.inf)
+
+    assert histogram.total == 2
+    assert histogram.quantile(0.5) == pytest.approx(0.5)
+    assert histogram.quantile(1) == math.inf
+
+
+def test_histogram_merge_rejects_mismatched_bins() -> None:
+    with pytest.raises(ValueError):
+        UsageHistogram(bin_width=0.001).merge(UsageHistogram(bin_width=0.01))
+
+
+def test_load_profile_uses_local_time() -> None:
+    analytics = UsageAnalytics()
+    # 2023-07-03 is a Monday, London is on BST (UTC+1) so 06:00 UTC is slot 14 locally.
+    analytics.add_readings(
+        [
+            mk_reading(0.5, datetime(2023, 7, 3, 6, 0, tzinfo=UTC)),
+            mk_reading(1.5, datetime(2023, 7, 10, 6, 0, tzinfo=UTC)),
+            mk_reading(2.0, datetime(2023, 7, 4, 6, 30, tzinfo=UTC)),
+        ],
+    )
+
+    profile = analytics.load_profile()
+    assert profile.readings == 3
+    assert profile.mean_consumption[0][14] == pytest.approx(1.0)
+    assert profile.mean_consumption[1][15] == pytest.approx(2.0)
+    assert profile.mean_consumption[0][15] is None
+
+
+def test_histogram_remove() -> None:
+    histogram = UsageHistogram()
+    histogram.add(0.5)
+    histogram.add(0.7)
+    histogram.add(math.inf)
+    histogram.remove(0.5)
+    histogram.remove(math.inf)
+
+    assert histogram.counts == {700: 1}
+    assert histogram.total == 1
+
+    # Removing a value that was never recorded is an accounting error, not a no-op.
+    with pytest.raises(ValueError):
+        histogram.remove(0.5)
+    with pytest.raises(ValueError):
+        histogram.remove(math.inf)
+    assert histogram.counts == {700: 1}
+
+
+def test_revised_reading_replaces_earlier() -> None:
+    analytics = UsageAnalytics(timezone=UTC)
+    start = datetime(2023, 7, 3, 6, 0, tzinfo=UTC)
+
+    assert analytics.add_readings([mk_reading(0.1, start), mk_reading(0.1, start)]) == 1
+    assert analytics.add_readings([mk_reading(0.9, start)]) == 1
+    assert len(analytics) == 1
+
+    assert analytics.percentiles((0.0, 1.0)) == {0.0: pytest.approx(0.9), 1.0: pytest.approx(0.9)}
+    profile = analytics.load_profile()
+    assert profile.readings == 1
+    assert profile.mean_consumption[0][12] == pytest.approx(0.9)
+    # Windows that only touch the edge day read the stored readings rather than the month bucket.
+    assert analytics.percentiles((1.0,), start=date(2023, 7, 3), end=date(2023, 7, 4)) == {
+        1.0: pytest.approx(0.9),
+    }
+
+
+@h.settings(deadline=None, max_examples=25)
+@h.given(
+    consumption=st.lists(ConsumptionStrat, min_size=1, max_size=24 * 90),
+    window=st.tuples(
+        st.integers(min_value=-5, max_value=60),
+        st.integers(min_value=0, max_value=100),
+    ),
+)
+def test_windowed_percentiles_match_raw_readings(
+    consumption: t.Sequence[float],
+    window: t.Tuple[int, int],
+) -> None:
+    # Readings every 90 minutes from late January, so windows straddle month boundaries.
+    first = datetime(2023, 1, 20, tzinfo=UTC)
+    readings = [
+        mk_reading(value, first + timedelta(minutes=90 * index))
+        for index, value in enumerate(consumption)
+    ]
+    analytics = UsageAnalytics(timezone=UTC)
+    analytics.add_readings(readings)
+
+    start = first.date() + timedelta(days=window[0])
+    end = start + timedelta(days=window[1])
+    in_window = [
+        reading.consumption
+        for reading in readings
+        if start <= reading.interval_start.date() < end
+    ]
+
+    result = analytics.percentiles((0.5, 0.95), start=start, end=end)
+    if not in_window:
+        assert result == {0.5: None, 0.95: None}
+        return
+
+    assert result[0.5] == pytest.approx(nearest_rank(in_window, 0.5))
+    assert result[0.95] == pytest.approx(nearest_rank(in_window, 0.95))
+    assert analytics.load_profile(start, end).readings == len(in_window)
+
+
+def test_slot_percentiles_and_baseload() -> None:
+    analytics = UsageAnalytics(timezone=UTC)
+    first = datetime(2023, 3, 1, tzinfo=UTC)
+    analytics.add_readings(
+        mk_reading(0.1 if index % 48 else 1.0 + index / 4800, first + timedelta(minutes=30 * index))
+        for index in range(48 * 30)
+    )
+
+    assert analytics.baseload() == pytest.approx(0.1)
+    assert analytics.percentiles((0.5,), slot=0)[0.5] == pytest.approx(1.0 + 48 * 14 / 4800)
+    assert analytics.percentiles((0.5,), slot=1)[0.5] == pytest.approx(0.1)
+    assert analytics.percentiles((0.5,), start=date(2024, 1, 1)) == {0.5: None}
+
+    with pytest.raises(ValueError):
+        analytics.percentiles(slot=48)
+
+
+def test_queries_only_merge_state_they_read(monkeypatch: pytest.MonkeyPatch) -> None:
+    merges: t.MutableSequence[UsageHistogram] = []
+    original_merge = UsageHistogram.merge
+
+    def counting_merge(self: UsageHistogram, other: UsageHistogram) -> None:
+        merges.append(other)
+        original_merge(self, other)
+
+    analytics = UsageAnalytics(timezone=UTC)
+    first = datetime(2023, 1, 1, tzinfo=UTC)
+    analytics.add_readings(
+        mk_reading((index % 97) / 1000, first + timedelta(minutes=30 * index))
+        for index in range(48 * 365 * 3)
+    )
+    monkeypatch.setattr(UsageHistogram, "merge", counting_merge)
+
+    # Unbounded queries read the running all-time state without merging anything.
+    analytics.percentiles()
+    analytics.percentiles(slot=3)
+    analytics.load_profile()
+    assert not merges
+
+    # Bounded queries merge one histogram per whole year or month in the window, not one per slot.
+    start, end = date(2023, 2, 1), date(2025, 8, 1)
+    analytics.percentiles(start=start, end=end)
+    assert len(merges) == 11 + 1 + 7
+    merges.clear()
+    analytics.percentiles(slot=3, start=start, end=end)
+    assert len(merges) == 11 + 1 + 7
+    merges.clear()
+    analytics.load_profile(start, end)
+    assert not merges
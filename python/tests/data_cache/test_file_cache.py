@@ -3,10 +3,11 @@
 import json
 import logging
 import typing as t
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import hypothesis as h
+import pytest
 from _pytest.tmpdir import TempPathFactory
 from hypothesis import strategies as st
 
@@ -91,3 +92,41 @@ def test_flush_and_load_data_consistent(
     LOG.debug("loaded_sample: %s", loaded_sample)
 
     assert loaded_sample == sample
+
+
+def test_file_cache_maintains_analytics(tmp_path_factory: TempPathFactory) -> None:
+    cache_path = tmp_path_per_case(tmp_path_factory) / "cache.json"
+    start = datetime(2023, 7, 3, tzinfo=timezone.utc)
+    readings = [
+        RawUsage(
+            consumption=0.1,
+            interval_start=start + timedelta(minutes=30 * index),
+            interval_end=start + timedelta(minutes=30 * (index + 1)),
+        )
+        for index in range(4)
+    ]
+    revised = readings[0].copy(update={"consumption": 0.9})
+
+    cache = FileCache(cache_path=cache_path)
+    assert cache.add_reading(readings[:3], EnergyType.ELECTRICITY) == 3
+    analytics = cache.usage_analytics(EnergyType.ELECTRICITY)
+    assert len(analytics) == 3
+
+    # Analytics built on first use are kept up to date by later additions and revisions.
+    assert cache.add_reading(readings, EnergyType.ELECTRICITY) == 1
+    assert cache.add_reading([revised], EnergyType.ELECTRICITY) == 1
+    assert cache.add_reading([revised], EnergyType.ELECTRICITY) == 0
+    assert len(analytics) == 4
+    assert analytics.percentiles((1.0,)) == {1.0: pytest.approx(0.9)}
+    assert len(cache.usage_analytics(EnergyType.GAS)) == 0
+    cache.flush()
+    assert len(cache.usage_data.electricity_usage) == 4
+    assert revised in cache.usage_data.electricity_usage
+
+    loaded = FileCache(cache_path=cache_path)
+    loaded.load()
+    assert loaded == cache
+    loaded_analytics = loaded.usage_analytics(EnergyType.ELECTRICITY)
+    assert len(loaded_analytics) == 4
+    assert loaded_analytics.percentiles((0.5, 1.0)) == analytics.percentiles((0.5, 1.0))
+    assert loaded_analytics.load_profile() == analytics.load_profile()